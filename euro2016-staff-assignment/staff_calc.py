@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
-from __future__ import division
-import sys, copy, random, time, datetime, codecs
+import sys, copy, random, time, datetime, codecs, calendar, csv
 from math import *
+import numpy as np
+from collections import namedtuple, Counter, defaultdict
 
 class Event:
 	def __init__(self,index,day,start,end,event,round,groups,areas):
@@ -26,7 +27,8 @@ class Event:
 		return str(self.event) + ", Round " + str(self.round) + ", " + str(self.day) + ", " + self.start.strftime("%H:%M") + " - " + self.end.strftime("%H:%M")
 		
 class Staff:
-	def __init__(self,name,fri,sat,sun,run,scr1,scr2,prac,proc):
+	def __init__(self,id,name,fri,sat,sun,run,scr1,scr2,prac,proc):
+		self.id = id
 		self.name = str(name)
 		self.fri = int(fri)
 		self.sat = int(sat)
@@ -48,18 +50,47 @@ class Staff:
 			self.proc = [str(n) for n in proc.split(",")]
 		else:
 			self.proc = []
+		self.scr1_set = frozenset(self.scr1)
+		self.scr2_set = frozenset(self.scr2)
+		self.scr2_count = Counter(self.scr2)
+		self.prac_set = frozenset(self.prac)
+		self.proc_set = frozenset(self.proc)
 	def __repr__(self):
 		return str(self.name)
 	def __str__(self):
 		return str(self.name)
 		
+# id is the group's column in avail, start_s and end_s are the group's start and end in seconds since the epoch,
+# duration_s its length in seconds
+class Group(namedtuple("Group", ["id","event","round","group","day","start","end","start_s","end_s","duration_s"])):
+	__slots__ = ()
+	def __repr__(self):
+		return str(self.event) + ", Round " + str(self.round) + ", Group " + str(self.group) + ", " + str(self.day) + ", " + self.start.strftime("%H:%M") + " - " + self.end.strftime("%H:%M")
+	def __str__(self):
+		return str(self.event) + ", Round " + str(self.round) + ", Group " + str(self.group) + ", " + str(self.day) + ", " + self.start.strftime("%H:%M") + " - " + self.end.strftime("%H:%M")
+
+def timestamp(d):
+	return calendar.timegm(d.timetuple())
+
+def overlapping(g,h):
+	# groups count as parallel if they are less than two minutes apart
+	return g.start_s < h.end_s + 2*60 and h.start_s < g.end_s + 2*60
+
+def add_to_schedule(s,label,g):
+	# schedules are mostly filled in chronological order, only remember those that need sorting
+	if len(Schedules[s.name]) > 0 and g.start_s < Schedules[s.name][-1][1].start_s:
+		Unsorted_schedules.add(s.name)
+	Schedules[s.name].append((label,g))
+		
 main_events = ["333","444","555","222","333bf","333oh","333ft","minx","pyram","sq1","clock","skewb","666","777"]
 side_events = ["333fm","444bf","555bf","333mbf"]
 scramblers_main = 3
 runners_main = 3
 judges_main = {1: 10, 2: 20, 3: 28}
+practice_time = 15*60 # seconds before competing
 Events = []
 Groups = []
+Groups_by_day = defaultdict(list)
 Staffs = []
 Grouping = {}
 Heats = {}
@@ -67,11 +98,15 @@ Scramblers = {}
 Runners = {}
 Judges = {}
 Labels = {"c": "Competitor", "p": "Possibly proceeded competitor", "s": "Scrambler", "r": "Runner", "j": "Judge"}
-avail = {}
 Schedules = {}
+Unsorted_schedules = set()
 Avail_side = {}
+Prac_window = {}
+Group_columns = {}
+Side_overlaps = {}
+Par_group = {}
 
-fin = open("schedule.dat", "r")
+fin = open("schedule.dat", "r", encoding="utf-8")
 num_events = 0
 tmp = fin.readline()
 while True:
@@ -87,21 +122,31 @@ for e in Events:
 		start = e.start + i*(datetime.timedelta(hours=e.end.hour, minutes=e.end.minute) - datetime.timedelta(hours=e.start.hour, minutes=e.start.minute)) // e.groups
 		end = e.start + (i+1)*(datetime.timedelta(hours=e.end.hour, minutes=e.end.minute) - datetime.timedelta(hours=e.start.hour, minutes=e.start.minute)) // e.groups
 		heats = [i*e.areas+j+1 for j in range(0,e.areas)]
-		g = (e.event,e.round,i+1,e.day,start,end)
+		g = Group(len(Groups),e.event,e.round,i+1,e.day,start,end,timestamp(start),timestamp(end),timestamp(end)-timestamp(start))
 		Groups.append(g)
+		Groups_by_day[g.day].append(g)
 		Heats[g] = heats
+
+# precompute output columns and group relations once instead of scanning all groups for every staff member,
+# related groups are always on the same day
+for g in Groups:
+	Group_columns[g] = [g.event, f"Round {g.round}", f"Group {g.group}", f"{g.day} {g.start:%H:%M} - {g.end:%H:%M}"]
+	Prac_window[g] = [h for h in Groups_by_day[g.day] if h.start_s < g.start_s and h.end_s > g.start_s - practice_time]
+	if g.event in main_events:
+		Side_overlaps[g] = [h for h in Groups_by_day[g.day] if h.event in side_events and overlapping(g,h)]
+		Par_group[g] = Side_overlaps[g][0] if Side_overlaps[g] else 0
 		
 	
-fin = open("staff.dat", "r")
+fin = open("staff.dat", "r", encoding="utf-8")
 tmp = fin.readline()
 while True:
 	tmp = fin.readline().split(";")
 	if len(tmp) > 1:
-		Staffs.append(Staff(tmp[0],tmp[1],tmp[2],tmp[3],tmp[4],tmp[5],tmp[6],tmp[7],tmp[8].replace("\n","")))
+		Staffs.append(Staff(len(Staffs),tmp[0],tmp[1],tmp[2],tmp[3],tmp[4],tmp[5],tmp[6],tmp[7],tmp[8].replace("\n","")))
 	else:
 		break
 		
-fin = open("Grouping.dat", "r")
+fin = open("Grouping.dat", "r", encoding="utf-8")
 tmp = fin.readline().split(";")
 gevents = [str(tmp[i].replace("\n","")) for i in range(3,len(tmp))]
 while True:
@@ -116,346 +161,294 @@ while True:
 for s in Staffs: 
 	if not s.name in Grouping:
 		Grouping[s.name] = {}
-		print "Warning: " + s.name + " is not included in the Grouping!"
+		print("Warning: " + s.name + " is not included in the Grouping!")
 		for e in gevents:
 			Grouping[s.name][e] = 0
 
-# remove availability because of competing or practising			
+# availability of each staff member (rows) for each group (columns):
+# 2 = available, 1 = available but practising before competing, 0 = not available
+avail = np.full((len(Staffs),len(Groups)), 2, dtype=np.int8)
+group_days = np.array([g.day for g in Groups])
+for day, staff_days in [("Friday",[s.fri for s in Staffs]),("Saturday",[s.sat for s in Staffs]),("Sunday",[s.sun for s in Staffs])]:
+	avail[np.ix_(np.array(staff_days) == 0, group_days == day)] = 0
+
+# remove availability because of competing or proceeding, as whole (staff x group) masks
+# (heats of a group are consecutive, so a bounds check on the grouping number suffices)
+event_col = {e: i for i, e in enumerate(gevents)}
+group_event = np.array([event_col[g.event] for g in Groups])
+group_round = np.array([g.round for g in Groups])
+heat_lo = np.array([Heats[g][0] for g in Groups])
+heat_hi = np.array([Heats[g][-1] for g in Groups])
+staff_heat = np.array([[Grouping[s.name][e] for e in gevents] for s in Staffs]).reshape(len(Staffs),len(gevents))[:,group_event]
+staff_proc = np.array([[e in s.proc_set for e in gevents] for s in Staffs]).reshape(len(Staffs),len(gevents))[:,group_event]
+competing = (group_round == 1) & (staff_heat >= heat_lo) & (staff_heat <= heat_hi)
+proceeding = (group_round > 1) & staff_proc
+busy = competing | proceeding
+avail[busy] = 0
+
+# schedules and practice windows only for the groups a staff member is busy in
 for s in Staffs:
-	avail[s.name] = {}
 	Schedules[s.name] = []
-	for g in Groups:
-		avail[s.name][g] = 2
-for s in Staffs:
-	for g in Groups:
-		if s.fri == 0 and g[3] == "Friday":
-			avail[s.name][g] = 0
-		if s.sat == 0 and g[3] == "Saturday":
-			avail[s.name][g] = 0
-		if s.sun == 0 and g[3] == "Sunday":
-			avail[s.name][g] = 0
-		if g[1] == 1 and Grouping[s.name][g[0]] in Heats[g]:
-			avail[s.name][g] = 0
-			Schedules[s.name].append(("c",g))
-			if g[0] in s.prac:
-				for h in Groups:
-					if avail[s.name][h] == 2 and h[4] < g[4] and h[5] > g[4] - datetime.timedelta(minutes=15):
-						avail[s.name][h] = 1
-		if g[1] > 1 and g[0] in s.proc:
-			avail[s.name][g] = 0
-			Schedules[s.name].append(("p",g))
-			if g[0] in s.prac:
-				for h in Groups:
-					if avail[s.name][h] == 2 and h[4] < g[4] and h[5] > g[4] - datetime.timedelta(minutes=15):
-						avail[s.name][h] = 1
+	for g_id in np.flatnonzero(busy[s.id]):
+		g = Groups[g_id]
+		add_to_schedule(s,"c" if competing[s.id,g_id] else "p",g)
+		if g.event in s.prac_set:
+			for h in Prac_window[g]:
+				if avail[s.id,h.id] == 2:
+					avail[s.id,h.id] = 1
 
 # comparison output for side events
-fout = open("output/avail_side.csv", "w")
-fout.write("Event,Round,Group,Timeframe,Amount of staff members\n")
-for g in Groups:
-	if g[0] in side_events:
-		avstaff = [s for s in Staffs if avail[s.name][g] > 0] 
-		out = g[0] + ",Round " + str(g[1]) + ",Group " + str(g[2]) + "," + g[3] + " " + g[4].strftime("%H:%M") + " - " + g[5].strftime("%H:%M") + "," + str(len(avstaff))
-		fout.write(out + "\n")
+fout = open("output/avail_side.csv", "w", newline="", encoding="utf-8")
+writer = csv.writer(fout, lineterminator="\n")
+writer.writerow(["Event","Round","Group","Timeframe","Amount of staff members"])
+writer.writerows(Group_columns[g] + [np.count_nonzero(avail[:,g.id] > 0)] for g in Groups if g.event in side_events)
 fout.close()
 						
 # fix conflicts with parallel events						
 for s in Staffs:
 	for g in Groups:
-		if g[0] in main_events:
-			for h in Groups:
-				if h[0] in side_events:
-					if g[4] - datetime.timedelta(minutes=1) < h[5] + datetime.timedelta(minutes=1) and h[4] - datetime.timedelta(minutes=1) < g[5] + datetime.timedelta(minutes=1):
-						if avail[s.name][g] == 0 and avail[s.name][h] > 0:
-							avail[s.name][h] = -1 # intermediate value to avoid chain reactions	
-						if avail[s.name][g] > 0 and avail[s.name][h] == 0:
-							avail[s.name][g] = -1
-for s in Staffs:
-	for g in Groups:
-		if avail[s.name][g] == -1:
-			avail[s.name][g] = 0
+		if g.event in main_events:
+			for h in Side_overlaps[g]:
+				if avail[s.id,g.id] == 0 and avail[s.id,h.id] > 0:
+					avail[s.id,h.id] = -1 # intermediate value to avoid chain reactions	
+				if avail[s.id,g.id] > 0 and avail[s.id,h.id] == 0:
+					avail[s.id,g.id] = -1
+avail[avail == -1] = 0
 			
 			
 # initial availability output
-fout = open("output/initial_availability.csv", "w")
-fout.write("Event,Round,Group,Timeframe,Amount of staff members\n")
-for g in Groups:
-	avstaff = [s for s in Staffs if avail[s.name][g] > 0] 
-	out = g[0] + ",Round " + str(g[1]) + ",Group " + str(g[2]) + "," + g[3] + " " + g[4].strftime("%H:%M") + " - " + g[5].strftime("%H:%M") + "," + str(len(avstaff))
-	fout.write(out + "\n")
+fout = open("output/initial_availability.csv", "w", newline="", encoding="utf-8")
+writer = csv.writer(fout, lineterminator="\n")
+writer.writerow(["Event","Round","Group","Timeframe","Amount of staff members"])
+writer.writerows(Group_columns[g] + [np.count_nonzero(avail[:,g.id] > 0)] for g in Groups)
 fout.close()
 
 # input check	
 errors = False	
-print "Input error checks:"
+print("Input error checks:")
 for s in Staffs:
 	for e in s.scr1:
 		if not (e in main_events or e in side_events):
-			print "Error for " + str(s.name) + ": Unknown scr1 event " + str(e) 
+			print("Error for " + str(s.name) + ": Unknown scr1 event " + str(e))
 			errors = True
 	for e in s.scr2:
 		if not (e in main_events or e in side_events):
-			print "Error for " + str(s.name) + ": Unknown scr2 event " + str(e) 
+			print("Error for " + str(s.name) + ": Unknown scr2 event " + str(e))
 			errors = True
-		if not e in s.scr1:
-			print "Error for " + str(s.name) + ": scr2 event " + str(e) + " not in scr1"
+		if not e in s.scr1_set:
+			print("Error for " + str(s.name) + ": scr2 event " + str(e) + " not in scr1")
 			errors = True
 	for e in s.prac:
 		if not (e in main_events or e in side_events):
-			print "Error for " + str(s.name) + ": Unknown prac event " + str(e) 
+			print("Error for " + str(s.name) + ": Unknown prac event " + str(e))
 			errors = True
 	for e in s.proc:
 		if not (e in main_events or e in side_events):
-			print "Error for " + str(s.name) + ": Unknown proc event " + str(e) 
+			print("Error for " + str(s.name) + ": Unknown proc event " + str(e))
 			errors = True
 	if s.fri not in [0,1] or s.sat not in [0,1] or s.sun not in [0,1]:
-		print "Error for " + str(s.name) + ": Fri/Sat/Sun not boolean."
+		print("Error for " + str(s.name) + ": Fri/Sat/Sun not boolean.")
 		errors = True
 	if s.run not in [0,1,2]:
-		print "Error for " + str(s.name) + ": False Running value."
+		print("Error for " + str(s.name) + ": False Running value.")
 		errors = True
 for e in gevents:
 	if not Grouping[s.name][e] in range(0,30):
-		print "Error for " + str(s.name) + ": Invalid group for " + str(e) + "."
+		print("Error for " + str(s.name) + ": Invalid group for " + str(e) + ".")
 for e in Events:
 	if not e.day in ["Friday","Saturday","Sunday"]:
-		print "Error: Unknown day for " + str(e)
+		print("Error: Unknown day for " + str(e))
 if errors == False:
-	print "No input errors!"
-
-	
+	print("No input errors!")
 # main part
+# candidates are ranked with a single composite sort key per group (the shuffle breaks ties),
+# staff members unavailable for the parallel side group come first
+def par_avail(s,par_group):
+	if par_group != 0:
+		return avail[s.id,par_group.id]
+	return 0
+
 lastg = 0
-workload = {}
-curr_wl = {}
-for s in Staffs:
-	workload[s.name] = datetime.timedelta(0)
-	curr_wl[s.name] = datetime.timedelta(0)
+workload = np.zeros(len(Staffs), dtype=np.int64) # seconds
+curr_wl = np.zeros(len(Staffs), dtype=np.int64) # seconds
 for g in Groups:
-	if g[0] in main_events:
-		if lastg <> 0:
-			if g[3] <> lastg[3]:
+	if g.event in main_events:
+		if lastg != 0:
+			if g.day != lastg.day:
 				lastg = 0
-				for s in Staffs:
-					curr_wl[s.name] = datetime.timedelta(0)
+				curr_wl[:] = 0
 					
-		par_group = 0
-		for h in Groups:
-			if h[0] in side_events and g[4] - datetime.timedelta(minutes=1) < h[5] + datetime.timedelta(minutes=1) and h[4] - datetime.timedelta(minutes=1) < g[5] + datetime.timedelta(minutes=1):
-				par_group = h
-				break
+		par_group = Par_group[g]
 				
 		h = len(Heats[g])
 		
 		Scramblers[g] = []
-		avstaff = [s for s in Staffs if avail[s.name][g] > 0 and (g[0] in s.scr2 or g[0] in s.scr1)] 
+		avstaff = [s for s in Staffs if avail[s.id,g.id] > 0 and (g.event in s.scr2_set or g.event in s.scr1_set)] 
 		if len(avstaff) < h*scramblers_main:
-			print "PROBLEM: Not enough staff for scrambling Group " + str(g)
-			exit(1)
+			print("PROBLEM: Not enough staff for scrambling Group " + str(g))
+			sys.exit(1)
 		random.shuffle(avstaff)
-		avstaff.sort(key=lambda s: curr_wl[s.name])
-		avstaff.sort(key=lambda s: workload[s.name])
-		avstaff.sort(key=lambda s: sum(1 for ev in s.scr2 if ev == g[0]), reverse = True)
-		avstaff.sort(key=lambda s: avail[s.name][g], reverse = True)
-		if par_group <> 0:
-			avstaff.sort(key=lambda s: avail[s.name][par_group])
+		avstaff.sort(key=lambda s: (par_avail(s,par_group), -avail[s.id,g.id], -s.scr2_count[g.event], workload[s.id], curr_wl[s.id]))
+		k = 0
 		for i in range(0,h*scramblers_main):
-			if lastg <> 0:
+			if lastg != 0:
 				if len(Scramblers[lastg]) >= i+1:
 					ls = Scramblers[lastg][i]
-					if g[0] in ls.scr2 and avail[ls.name][g] == 2 and curr_wl[ls.name] + g[5] - g[4] <= datetime.timedelta(hours=1):
+					if g.event in ls.scr2_set and avail[ls.id,g.id] == 2 and curr_wl[ls.id] + g.duration_s <= 60*60:
 						Scramblers[g].append(ls)
-						Schedules[ls.name].append(("s",g))
-						avail[ls.name][g] = 0
-						avstaff.remove(ls)
-						workload[ls.name] += g[5] - g[4]
-						curr_wl[ls.name] += g[5] - g[4]
-						if par_group <> 0:
-							avail[ls.name][par_group] = 0
+						add_to_schedule(ls,"s",g)
+						avail[ls.id,g.id] = 0
+						workload[ls.id] += g.duration_s
+						curr_wl[ls.id] += g.duration_s
+						if par_group != 0:
+							avail[ls.id,par_group.id] = 0
 			if len(Scramblers[g]) < i+1:
-				chs = avstaff[0]
+				while avail[avstaff[k].id,g.id] == 0: # already assigned to this group
+					k += 1
+				chs = avstaff[k]
 				Scramblers[g].append(chs)
-				Schedules[chs.name].append(("s",g))
-				avail[chs.name][g] = 0
-				avstaff.remove(chs)
-				workload[chs.name] += g[5] - g[4]
-				curr_wl[chs.name] += g[5] - g[4]
-				if par_group <> 0:
-					avail[chs.name][par_group] = 0
+				add_to_schedule(chs,"s",g)
+				avail[chs.id,g.id] = 0
+				workload[chs.id] += g.duration_s
+				curr_wl[chs.id] += g.duration_s
+				if par_group != 0:
+					avail[chs.id,par_group.id] = 0
 		
 		Runners[g] = []
-		avstaff = [s for s in Staffs if avail[s.name][g] > 0 and s.run > 0] 
+		avstaff = [s for s in Staffs if avail[s.id,g.id] > 0 and s.run > 0] 
 		if len(avstaff) < h*runners_main:
-			print "PROBLEM: Not enough staff for runners of Group " + str(g)
-			exit(1)
+			print("PROBLEM: Not enough staff for runners of Group " + str(g))
+			sys.exit(1)
 		random.shuffle(avstaff)
-		avstaff.sort(key=lambda s: curr_wl[s.name])
-		avstaff.sort(key=lambda s: s.run, reverse = True)
-		avstaff.sort(key=lambda s: workload[s.name])
-		avstaff.sort(key=lambda s: avail[s.name][g], reverse = True)
-		if par_group <> 0:
-			avstaff.sort(key=lambda s: avail[s.name][par_group])
+		avstaff.sort(key=lambda s: (par_avail(s,par_group), -avail[s.id,g.id], workload[s.id], -s.run, curr_wl[s.id]))
+		k = 0
 		for i in range(0,h*runners_main):
-			if lastg <> 0:
+			if lastg != 0:
 				if len(Runners[lastg]) >= i+1:
 					ls = Runners[lastg][i]
-					if avail[ls.name][g] == 2 and curr_wl[ls.name] + g[5] - g[4] <= datetime.timedelta(hours=1):
+					if avail[ls.id,g.id] == 2 and curr_wl[ls.id] + g.duration_s <= 60*60:
 						Runners[g].append(ls)
-						Schedules[ls.name].append(("r",g))
-						avail[ls.name][g] = 0
-						avstaff.remove(ls)
-						workload[ls.name] += g[5] - g[4]
-						curr_wl[ls.name] += g[5] - g[4]
-						if par_group <> 0:
-							avail[ls.name][par_group] = 0
+						add_to_schedule(ls,"r",g)
+						avail[ls.id,g.id] = 0
+						workload[ls.id] += g.duration_s
+						curr_wl[ls.id] += g.duration_s
+						if par_group != 0:
+							avail[ls.id,par_group.id] = 0
 			if len(Runners[g]) < i+1:
-				chs = avstaff[0]
+				while avail[avstaff[k].id,g.id] == 0: # already assigned to this group
+					k += 1
+				chs = avstaff[k]
 				Runners[g].append(chs)
-				Schedules[chs.name].append(("r",g))
-				avail[chs.name][g] = 0
-				avstaff.remove(chs)
-				workload[chs.name] += g[5] - g[4]
-				curr_wl[chs.name] += g[5] - g[4]
-				if par_group <> 0:
-					avail[chs.name][par_group] = 0
+				add_to_schedule(chs,"r",g)
+				avail[chs.id,g.id] = 0
+				workload[chs.id] += g.duration_s
+				curr_wl[chs.id] += g.duration_s
+				if par_group != 0:
+					avail[chs.id,par_group.id] = 0
 				
 		Judges[g] = []
-		avstaff = [s for s in Staffs if avail[s.name][g] > 0] 
+		avstaff = [s for s in Staffs if avail[s.id,g.id] > 0] 
 		if len(avstaff) < judges_main[h]:
-			print "Warning: Not enough staff for judging Group " + str(g)
-			print str(len(avstaff)) + " available, but " + str(judges_main[h]) + " needed!"
+			print("Warning: Not enough staff for judging Group " + str(g))
+			print(str(len(avstaff)) + " available, but " + str(judges_main[h]) + " needed!")
 		random.shuffle(avstaff)
-		avstaff.sort(key=lambda s: curr_wl[s.name])
-		avstaff.sort(key=lambda s: workload[s.name])
-		avstaff.sort(key=lambda s: avail[s.name][g], reverse = True)
-		if par_group <> 0:
-			avstaff.sort(key=lambda s: avail[s.name][par_group])
+		avstaff.sort(key=lambda s: (par_avail(s,par_group), -avail[s.id,g.id], workload[s.id], curr_wl[s.id]))
+		k = 0
 		for i in range(0,judges_main[h]):
-			if len(avstaff) == 0:
+			if len(Judges[g]) == len(avstaff):
 				for j in range(i,judges_main[h]):
 					Judges[g].append("NA")
 				break
-			if lastg <> 0:
-				if len(Judges[lastg]) >= i+1 and Judges[lastg][-1] <> "NA":
+			if lastg != 0:
+				if len(Judges[lastg]) >= i+1 and Judges[lastg][-1] != "NA":
 					ls = Judges[lastg][i]
-					if avail[ls.name][g] == 2 and curr_wl[ls.name] + g[5] - g[4] <= datetime.timedelta(hours=1):
+					if avail[ls.id,g.id] == 2 and curr_wl[ls.id] + g.duration_s <= 60*60:
 						Judges[g].append(ls)
-						Schedules[ls.name].append(("j",g))
-						avail[ls.name][g] = 0
-						avstaff.remove(ls)
-						workload[ls.name] += g[5] - g[4]
-						curr_wl[ls.name] += g[5] - g[4]
-						if par_group <> 0:
-							avail[ls.name][par_group] = 0
+						add_to_schedule(ls,"j",g)
+						avail[ls.id,g.id] = 0
+						workload[ls.id] += g.duration_s
+						curr_wl[ls.id] += g.duration_s
+						if par_group != 0:
+							avail[ls.id,par_group.id] = 0
 			if len(Judges[g]) < i+1:
-				chs = avstaff[0]
+				while avail[avstaff[k].id,g.id] == 0: # already assigned to this group
+					k += 1
+				chs = avstaff[k]
 				Judges[g].append(chs)
-				Schedules[chs.name].append(("j",g))
-				avail[chs.name][g] = 0
-				avstaff.remove(chs)
-				workload[chs.name] += g[5] - g[4]
-				curr_wl[chs.name] += g[5] - g[4]
-				if par_group <> 0:
-					avail[chs.name][par_group] = 0
+				add_to_schedule(chs,"j",g)
+				avail[chs.id,g.id] = 0
+				workload[chs.id] += g.duration_s
+				curr_wl[chs.id] += g.duration_s
+				if par_group != 0:
+					avail[chs.id,par_group.id] = 0
 				
 		for s in Staffs:
 			if not (s in Scramblers[g] or s in Runners[g] or s in Judges[g]):
-				curr_wl[s.name] = datetime.timedelta(0)
+				curr_wl[s.id] = 0
 				
 		lastg = g
 					
 for g in Groups:
-	if g[0] in side_events:
-		avstaff = [s for s in Staffs if avail[s.name][g] > 0] 
+	if g.event in side_events:
+		avstaff = [s for s in Staffs if avail[s.id,g.id] > 0] 
 		Avail_side[g] = avstaff
-		if g[0] <> "333fm":
+		if g.event != "333fm":
 			for s in avstaff:
-				Schedules[s.name].append(("j",g))
-		#print g[0]
-		#print len(avstaff)
+				add_to_schedule(s,"j",g)
+		#print(g.event)
+		#print(len(avstaff))
 		
-for s in Staffs:
-	Schedules[s.name].sort(key=lambda k: k[1][4])
+for name in Unsorted_schedules:
+	Schedules[name].sort(key=lambda k: k[1].start_s)
 	
 # Consistency check
 errors = False
 for s in Staffs:
 	sched = Schedules[s.name]
 	for k in range(1,len(sched)):
-		if sched[k][1][4] < sched[k-1][1][5]:
+		if sched[k][1].start_s < sched[k-1][1].end_s:
 			errors = True
-			print "Consistency error for " + s.name + "!"
-			print sched[k-1]
-			print sched[k]
+			print("Consistency error for " + s.name + "!")
+			print(sched[k-1])
+			print(sched[k])
 if errors == False:
-	print "Consistency check passed!"		
-	
+	print("Consistency check passed!")
 # Output
-fout = open("output/scramblers_main.csv", "w")
-out = "Event,Round,Group,Timeframe" 
-for i in range(1,10):
-	out += ",Scrambler " + str(i)
-fout.write(out + "\n")
-for g in Groups:
-	if g[0] in main_events:
-		out = g[0] + ",Round " + str(g[1]) + ",Group " + str(g[2]) + "," + g[3] + " " + g[4].strftime("%H:%M") + " - " + g[5].strftime("%H:%M")
-		for s in Scramblers[g]:
-			out += "," + str(s)
-		fout.write(out + "\n")
+fout = open("output/scramblers_main.csv", "w", newline="", encoding="utf-8")
+writer = csv.writer(fout, lineterminator="\n")
+writer.writerow(["Event","Round","Group","Timeframe"] + ["Scrambler " + str(i) for i in range(1,10)])
+writer.writerows(Group_columns[g] + Scramblers[g] for g in Groups if g.event in main_events)
 fout.close()
 		
-fout = open("output/runners_main.csv", "w")
-out = "Event,Round,Group,Timeframe" 
-for i in range(1,10):
-	out += ",Runner " + str(i)
-fout.write(out + "\n")
-for g in Groups:
-	if g[0] in main_events:
-		out = g[0] + ",Round " + str(g[1]) + ",Group " + str(g[2]) + "," + g[3] + " " + g[4].strftime("%H:%M") + " - " + g[5].strftime("%H:%M")
-		for s in Runners[g]:
-			out += "," + str(s)
-		fout.write(out + "\n")
+fout = open("output/runners_main.csv", "w", newline="", encoding="utf-8")
+writer = csv.writer(fout, lineterminator="\n")
+writer.writerow(["Event","Round","Group","Timeframe"] + ["Runner " + str(i) for i in range(1,10)])
+writer.writerows(Group_columns[g] + Runners[g] for g in Groups if g.event in main_events)
 fout.close()
 		
-fout = open("output/judges_main.csv", "w")
-out = "Event,Round,Group,Timeframe" 
-for i in range(1,29):
-	out += ",Judge " + str(i)
-fout.write(out + "\n")
-for g in Groups:
-	if g[0] in main_events:
-		out = g[0] + ",Round " + str(g[1]) + ",Group " + str(g[2]) + "," + g[3] + " " + g[4].strftime("%H:%M") + " - " + g[5].strftime("%H:%M")
-		for s in Judges[g]:
-			out += "," + str(s)
-		fout.write(out + "\n")
+fout = open("output/judges_main.csv", "w", newline="", encoding="utf-8")
+writer = csv.writer(fout, lineterminator="\n")
+writer.writerow(["Event","Round","Group","Timeframe"] + ["Judge " + str(i) for i in range(1,29)])
+writer.writerows(Group_columns[g] + Judges[g] for g in Groups if g.event in main_events)
 fout.close()
 		
-fout = open("output/staff_side.csv", "w")
-out = "Event,Round,Group,Timeframe,Available staff members" 
-fout.write(out + "\n")
-for g in Groups:
-	if g[0] in side_events:
-		out = g[0] + ",Round " + str(g[1]) + ",Group " + str(g[2]) + "," + g[3] + " " + g[4].strftime("%H:%M") + " - " + g[5].strftime("%H:%M")
-		for s in Avail_side[g]:
-			out += "," + str(s)
-		fout.write(out + "\n")
+fout = open("output/staff_side.csv", "w", newline="", encoding="utf-8")
+writer = csv.writer(fout, lineterminator="\n")
+writer.writerow(["Event","Round","Group","Timeframe","Available staff members"])
+writer.writerows(Group_columns[g] + Avail_side[g] for g in Groups if g.event in side_events)
 fout.close()
 
-fout = open("output/staff_workloads.csv", "w")
+fout = open("output/staff_workloads.csv", "w", newline="", encoding="utf-8")
 fout.write("Workload of the staff members\n")
-for s in Staffs:
-	fout.write(s.name + ": " + str(workload[s.name]) + "\n")
+fout.write("".join(s.name + ": " + str(datetime.timedelta(seconds=int(workload[s.id]))) + "\n" for s in Staffs))
 fout.close()
 
-fout = open("output/staff_schedules.csv", "w")
+# collect all rows first and write them in one go, this is the largest output file
+rows = []
 for s in Staffs:
-	fout.write(s.name + "\n")
-	fout.write("\n")
-	for k in Schedules[s.name]:
-		if k[0] <> "p":
-			out = Labels[k[0]] + ","
-			g = k[1]
-			out += g[0] + ",Round " + str(g[1]) + ",Group " + str(g[2]) + "," + g[3] + " " + g[4].strftime("%H:%M") + " - " + g[5].strftime("%H:%M") + "\n"
-			fout.write(out)	
-	fout.write("\n")
+	rows += [[s.name], []]
+	rows += [[Labels[k[0]]] + Group_columns[k[1]] for k in Schedules[s.name] if k[0] != "p"]
+	rows.append([])
+fout = open("output/staff_schedules.csv", "w", newline="", encoding="utf-8", buffering=1024*1024)
+csv.writer(fout, lineterminator="\n").writerows(rows)
 fout.close()
\ No newline at end of file
@@ -21,18 +21,24 @@
 # 2019-02-10: conversion to Python 3, ignoring local names in proper ()-brackets.
 # 2019-02-12: add characters code to the output, update instructions
 # 2019-09-20: minor modifications for upload
+# 2026-10-15: faster name validation using str.translate and an ASCII fast path
 
 import csv, string, sys, datetime
 
 allowed = " .-()'"
+allowed_table = str.maketrans("", "", allowed)
+ascii_allowed_table = str.maketrans("", "", string.ascii_letters + allowed)
+bad_parentheses = frozenset("（）")
+bad_apostrophes = frozenset("’`")
+printable_chars = frozenset(string.printable)
 
 def validate(s):
 
-	out = ""
-	invalid = []
-	for x in s:
-		if not (x.isalpha()) and not (x in allowed): # not a letter
-			invalid.append(x)
+	# strip allowed characters in one C-level pass, most names are letters only afterwards
+	residue = s.translate(allowed_table)
+	if residue == "" or residue.isalpha():
+		return True, []
+	invalid = [x for x in residue if not x.isalpha()] # not a letter
 	flag = len(invalid) == 0
 	return flag, invalid
 
@@ -45,14 +51,13 @@ def suggestion(invalid):
 	printable = True
 	
 	out = []
-	char_codes = []
 	for x in invalid:
 	
-		if x in "（）" and parenthesis:
+		if x in bad_parentheses and parenthesis:
 			parenthesis = False
 			out.append("Use regular parenthesis")
 
-		if x in "’`" and apostophre:
+		if x in bad_apostrophes and apostophre:
 			apostophre = False
 			out.append("Use regular apostrophe")
 
@@ -60,12 +65,11 @@ def suggestion(invalid):
 			dot = False
 			out.append("Replace by regular dot")
 
-		if not x in string.printable and printable:
+		if not x in printable_chars and printable:
 			printable = False
 			out.append("Not printable character detected")
-		
-		char_codes.append(str(ord(x)))
 			
+	char_codes = map(str, map(ord, invalid))
 	return " - ".join(out) +"\tChar codes: "+ ", ".join(char_codes)
 
 if __name__ == "__main__":
@@ -78,6 +82,8 @@ if __name__ == "__main__":
 			name = line[2]
 			if '(' in name and name[-1] == ')':
 				name = name[:name.find('(')]
+			if name.isascii() and name.translate(ascii_allowed_table) == "":
+				continue # common case: plain ASCII name without invalid characters
 			flag, invalid = validate(name)
 			
 			if not flag:
@@ -33,7 +33,8 @@ try:
 except:
     print("Error: could not load export data from folder " + db_export_dir)
 
-results['zeros'] = sum((results['value'+str(i)]==0) for i in [1,2,3,4,5])
+values = results[['value'+str(i) for i in [1,2,3,4,5]]].to_numpy()
+results['zeros'] = (values == 0).sum(axis=1).astype(np.int8)
 results = results.sort_values(by=['competitionId','eventId','roundTypeId','pos'])
 results = results[['competitionId','eventId','roundTypeId','pos','zeros']]
 combined_round_types = ["c","d","e","g","h"]
@@ -43,23 +44,20 @@ combined_results = results[results.roundTypeId.isin(combined_round_types)]
 ## analyze for strange rounds
 
 # determine min and max positions for each number of zeros per rounds
-min_pos_per_zero = combined_results.groupby(by=['competitionId','eventId','roundTypeId','zeros']).min()
-max_pos_per_zero = combined_results.groupby(by=['competitionId','eventId','roundTypeId','zeros']).max()
-
-# merge them!
-min_pos_per_zero = min_pos_per_zero.rename(columns={'pos': 'min_pos'})
-max_pos_per_zero = max_pos_per_zero.rename(columns={'pos': 'max_pos'})
-df = min_pos_per_zero.merge(max_pos_per_zero, left_index=True, right_index=True)
+df = combined_results.groupby(by=['competitionId','eventId','roundTypeId','zeros'], sort=False).agg(
+    min_pos=('pos','min'), max_pos=('pos','max'))
 df = df.reset_index()
 
-# merge dataframe on itself to get all possible combinations of zeros and
-# min/max positions. Then strange rounds can be identified very easily!
-
-df = df.merge(df, how='inner', on=['competitionId','eventId','roundTypeId'])
-strange_index = (df['min_pos_x'] <= df['max_pos_y']) & (df['zeros_x'] > df['zeros_y'])
-strange_df = df[strange_index]
+# a round is strange if, for some number of zeros, the best position is not
+# strictly better than the worst position of all competitors with fewer zeros.
+# Sorting by zeros within each round, this is a running maximum of max_pos.
+round_keys = ['competitionId','eventId','roundTypeId']
+df = df.sort_values(by=round_keys + ['zeros'])
+df['max_pos_fewer_zeros'] = df.groupby(by=round_keys)['max_pos'].cummax()
+df['max_pos_fewer_zeros'] = df.groupby(by=round_keys)['max_pos_fewer_zeros'].shift(1)
+strange_df = df[df['min_pos'] <= df['max_pos_fewer_zeros']]
 strange_df = strange_df[['competitionId','eventId','roundTypeId']].drop_duplicates()
-strange_df['year'] = strange_df.apply(lambda x: int(x['competitionId'][-4:]),axis=1)
+strange_df['year'] = strange_df['competitionId'].str[-4:].astype('int16')
 strange_df = strange_df.sort_values(by=['year','competitionId','eventId','roundTypeId'])
 
 # result output
@@ -24,7 +24,9 @@ mostly omitted exception handling.
 __author__ = "Sébastien Auroux"
 __contact__ = "sebastien@auroux.de"
 
+from concurrent.futures import ProcessPoolExecutor
 import datetime
+from functools import lru_cache
 import numpy as np
 import pandas as pd
 import time
@@ -37,6 +39,9 @@ if not DB_EXPORT_DIR[-1] == '/':
     DB_EXPORT_DIR += '/'
 # Name of the output file
 OUTPUT_FILE = "record_consistency_output_{}.tsv".format(datetime.datetime.now().strftime("%Y%m%d"))
+# record columns read by output_tuple
+OUTPUT_COLUMNS = ['personId', 'country', 'continent', 'value', 'competitionId', 'start_date', 'end_date', 'round',
+                  'marker', 'computed']
 
 # defining record markers
 WR_MARKER = 'WR'
@@ -59,73 +64,37 @@ def get_marker(region):
         return NR_MARKER
 
 
-def get_round_rank(round_type):
-    return ROUND_RANKS[round_type]
-
-
-def get_start_date(row):
-    year, month, day = row['year'], row['month'], row['day']
-    return datetime.date(year, month, day).strftime('%Y-%m-%d')
-
-
-def get_end_date(row):
-    year, month, day, end_month, end_day = (row['year'], row['month'], row['day'], row['endMonth'], row['endDay'])
-    if int(end_month) < int(month):  # turn of the year
-        return datetime.date(year + 1, end_month, end_day).strftime('%Y-%m-%d')
-    else:
-        return datetime.date(year, end_month, end_day).strftime('%Y-%m-%d')
-
-
+@lru_cache(maxsize=None)
 def format_result(value, event_id):
-    """ formats results for output """
+    """ formats results for output (cached, since many errors share the same values) """
 
     # do not format FMC and MultiBlind for simplicity
     if event_id in ['333fm', '333mbf']:
         return str(value)
     else:
-        out = str(datetime.timedelta(milliseconds=10 * int(value)))
-        # str(timedelta) produces either 6 (microseconds > 0) or no digits
-        # (microseconds = 0). Make it uniformly two.
-        if out[-7] == '.':
-            out = out[:-4]
-        else:
-            out += '.00'
+        # split the centiseconds into h:mm:ss.cc directly instead of going through str(timedelta)
+        minutes, centiseconds = divmod(int(value), 6000)
+        hours, minutes = divmod(minutes, 60)
+        out = '{}:{:02d}:{:02d}.{:02d}'.format(hours, minutes, centiseconds // 100, centiseconds % 100)
         # remove leading zeros
-        for bad_padding in ['0:00:0', '0:00:', '0:0', '0:', '0']:
-            rel_index = len(bad_padding)
-            if out[:rel_index] == bad_padding:
-                out = out[rel_index:]
-
-        return out
-
+        return out.lstrip('0:')
 
-def check_record(value, min_per_round, cummin_above, past_records, region):
-    """ helper function to check whether or not a given result could potentially be a record """
 
-    # min_per_round (best result per round) is already known at this point, so if there was already a
-    # better results for this competition, round, region then return False
-    if min_per_round < value:
-        return False
+def check_record(value, past_records, region):
+    """ helper function to check whether or not a given result could potentially be a record
 
-    # further, the result needs to be at least as good as all preceding values
-    if cummin_above < value:
-        return False
-
-    # otherwise compare against past records
+    The result is expected to be the best of its round and at least as good as all preceding values of its
+    competition for the given region already (see the potential_* columns), so only the standing records remain.
+    """
     return region not in past_records or value <= past_records[region]
 
 
-def get_past_records(df, value_col):
-    """ helper function to construct a dict of standing records from the given DataFrame """
+def update_past_records(past_records, value, regions):
+    """ helper function to fold a result into the dict of standing records of the given regions """
 
-    if df.empty:
-        return {}
-
-    past_records = {'World': df[value_col].min()}
-    past_records.update(df[['continentId', value_col]].groupby('continentId')[value_col].min().to_dict())
-    past_records.update(df[['personCountryId', value_col]].groupby('personCountryId')[value_col].min().to_dict())
-
-    return past_records
+    for region in regions:
+        if region not in past_records or value < past_records[region]:
+            past_records[region] = value
 
 
 def evaluate_records(records, comp_year, event_id, kind, clear_errors, possible_errors, evaluated_hashes):
@@ -142,28 +111,33 @@ def evaluate_records(records, comp_year, event_id, kind, clear_errors, possible_
     if len(records) == 0:
         return None
 
-    records_hash = pd.util.hash_pandas_object(records).sum()
+    # all record sets are slices of the same record DataFrame that keep its row order, so a set is identified by
+    # the bytes of its row labels
+    records_hash = records.index.to_numpy().tobytes()
     if records_hash in evaluated_hashes:
         # this set of records was already checked, don't check again!
         return None
-    evaluated_hashes.append(records_hash)
+    evaluated_hashes.add(records_hash)
+
+    # compare the markers once on the underlying arrays, all checks below need this
+    markers_match = records['marker'].to_numpy() == records['computed'].to_numpy()
 
     if len(records) == 1:
-        if records.iloc[0]['marker'] != records.iloc[0]['computed']:
+        if not markers_match[0]:
             # only one record without conflicts differing from computed, so this is a clear error
             store_errors(records, event_id, kind, clear_errors)
         return None
 
-    if records['value'].nunique() == 1 and not (records['marker'] == records['computed']).all():
+    single_competition = records['competitionId'].nunique() == 1
+    if records['value'].nunique() == 1 and not markers_match.all():
         # ties should always be marked as awarded records, otherwise this is a clear error
         store_errors(records, event_id, kind, clear_errors)
-    elif comp_year < 2013 and records['competitionId'].nunique() == 1 \
-            and (records['marker'] == records['computed']).all():
+    elif comp_year < 2013 and single_competition and markers_match.all():
         # before 2013, records were awarded at the end of each round, thus everything is fine
         # if there is just one competition and if all existing markers match the computed ones.
         pass
-    elif comp_year >= 2013 and records['competitionId'].nunique() == 1 \
-            and records.iloc[0]['num_days'] < records.loc[records['marker'] != '', 'value'].nunique():
+    elif comp_year >= 2013 and single_competition \
+            and records['num_days'].iat[0] < records.loc[records['marker'] != '', 'value'].nunique():
         # since 2013, any competition with number of days < number of distinct records (without ties) is a clear error
         store_errors(records, event_id, kind, clear_errors)
     else:  # possible error
@@ -171,12 +145,17 @@ def evaluate_records(records, comp_year, event_id, kind, clear_errors, possible_
 
 
 def store_errors(records, event_id, kind, errors):
-    """ helper function to store record errors """
+    """ helper function to store record errors
 
-    err = [output_tuple(row, event_id, kind) for _, row in records.iterrows()]
+    errors is a dict keyed by the error tuples, which drops duplicates in constant time and keeps the insertion order
+    """
+
+    # (the record sets are small, so reading the needed columns as lists beats building a row Series per record)
+    err = [output_tuple(dict(zip(OUTPUT_COLUMNS, row)), event_id, kind)
+           for row in zip(*(records[col].tolist() for col in OUTPUT_COLUMNS))]
 
-    if err and err not in errors:
-        errors.append(err)
+    if err:
+        errors.setdefault(tuple(err), err)
 
     return errors
 
@@ -196,6 +175,7 @@ def format_error_output(err):
 def record_consistency_check(df, competition_dates, event_id, kind):
     """ checks for consistency of all records of a certain event and a
     certainly kind(single or average) and stores all clear/possible errors.
+    The given DataFrame is expected to contain the results of this event only.
     The function loops through all competitions ordered by start_date,
     compared result to all records that happened strictly before a given
     competition and eventually stores clear errors and possible errors. """
@@ -210,104 +190,159 @@ def record_consistency_check(df, competition_dates, event_id, kind):
     marker_col = 'regionalSingleRecord' if kind == 'single' else 'regionalAverageRecord'
 
     # reduce provided data to relevant rows and columns to improve execution time
-    df = df[(df['eventId'] == event_id) & (df[value_col] > 0)]
-    df = df.drop(columns=['eventId', 'average' if kind == 'single' else 'best'])
-    df = df.sort_values(by=['start_date', 'end_date', 'competitionId', 'round_rank', value_col])
+    df = df[df[value_col] > 0]
+    df = df.drop(columns=['average' if kind == 'single' else 'best'])
+    # sort by start_date, end_date, competitionId, round_rank and value on integer keys only (np.lexsort takes the
+    # primary key last and is stable); the categories of competitionId are sorted, so their codes keep the order
+    df = df.iloc[np.lexsort((df[value_col].to_numpy(), df['round_rank'].to_numpy(),
+                             df['competitionId'].cat.codes.to_numpy(), df['end_date'].to_numpy().view('i8'),
+                             df['start_date'].to_numpy().view('i8')))]
 
     # from the remaining rows, only those with a marker or with the best value per round and country are relevant
-    df['min_round_nat'] = df.groupby(['competitionId', 'roundTypeId', 'personCountryId'])[value_col].transform('min')
+    df['min_round_nat'] = df.groupby(['competitionId', 'roundTypeId', 'personCountryId'],
+                                     sort=False, observed=True)[value_col].transform('min')
     df = df[(df[value_col] == df['min_round_nat']) | (df[marker_col] != '')]
 
     # generate more helpful columns for the upcoming consistency check
-    df['min_round_con'] = df.groupby(['competitionId', 'roundTypeId', 'continentId'])[value_col].transform('min')
-    df['min_round_world'] = df.groupby(['competitionId', 'roundTypeId'])[value_col].transform('min')
-    df['cummin_comp_nat'] = df.groupby(['competitionId', 'personCountryId'])[value_col].agg('cummin')
-    df['cummin_comp_con'] = df.groupby(['competitionId', 'continentId'])[value_col].agg('cummin')
-    df['cummin_comp_world'] = df.groupby(['competitionId'])[value_col].agg('cummin')
+    # (the group order does not matter for transform and cummin, so skip sorting the group keys; the keys are
+    # categorical, so only groups that actually occur for this event are built)
+    df['min_round_con'] = df.groupby(['competitionId', 'roundTypeId', 'continentId'],
+                                     sort=False, observed=True)[value_col].transform('min')
+    df['min_round_world'] = df.groupby(['competitionId', 'roundTypeId'],
+                                       sort=False, observed=True)[value_col].transform('min')
+    df['cummin_comp_nat'] = df.groupby(['competitionId', 'personCountryId'],
+                                       sort=False, observed=True)[value_col].agg('cummin')
+    df['cummin_comp_con'] = df.groupby(['competitionId', 'continentId'],
+                                       sort=False, observed=True)[value_col].agg('cummin')
+    df['cummin_comp_world'] = df.groupby(['competitionId'], sort=False, observed=True)[value_col].agg('cummin')
+
+    # a result can only be a record if there was no better result for this competition, round and region (the best
+    # result per round is already known at this point) and if it is at least as good as all preceding values.
+    # Both conditions are evaluated for all rows at once, only the past records depend on the loop below.
+    for level in ['nat', 'con', 'world']:
+        df['potential_' + level] = (df['min_round_' + level] >= df[value_col]) \
+            & (df['cummin_comp_' + level] >= df[value_col])
 
     # create needed lists and dictionaries to store the consistency check results
-    all_records, past_records = [], {}
-    clear_errors, possible_errors = [], []
-    old_start_date = np.min(df['start_date'])
+    past_records = {}
+    # (clear errors found while computing the records come first, the ones stored by evaluate_records are deduplicated)
+    stored_clear_errors, possible_errors = {}, {}
+    # computed marker and region per loop row, '' if the row is no potential record
+    computed_markers, regions = [], []
+
+    # extract the needed columns once and walk them in parallel, which is much faster than iterating over the rows
+    loop_columns = ['personCountryId', 'continentId', value_col, 'start_date',
+                    'potential_nat', 'potential_con', 'potential_world']
+
+    # best results per end date and country (which also yields the continental and world minimums), ordered by
+    # end date; each one is added to past_records as soon as it ended before the current start date
+    past = df.groupby(['end_date', 'continentId', 'personCountryId'], observed=True)[value_col].min().reset_index()
+    past_results = list(zip(past['end_date'].tolist(), past[value_col].tolist(),
+                            past['continentId'].tolist(), past['personCountryId'].tolist()))
+    past_index = 0
 
     # first compute all potential records
-    for index, row in df.iterrows():
-        competition = row['competitionId']
-        round_id = row['roundTypeId']
-        country = row['personCountryId']
-        continent = row['continentId']
-        value = int(row[value_col])
-        marker = row[marker_col]
-        s_date = row['start_date']
-
-        if s_date != old_start_date:
-            past_records = get_past_records(df[df['end_date'] < s_date], value_col)
-
-        record_data = {'personId': row['personId'], 'competitionId': competition, 'round': round_id, 'value': value,
-                       'country': country, 'continent': continent, 'start_date': s_date, 'end_date': row['end_date'],
-                       'marker': marker, 'computed': ''}
+    # (rows that can neither be a national record nor carry a marker would not produce anything, so they are
+    # skipped up front; they still count towards past_records above)
+    loop_df = df[df['potential_nat'] | (df[marker_col] != '')]
+    for (country, continent, value, s_date,
+         potential_nat, potential_con, potential_world) in zip(*(loop_df[col].tolist() for col in loop_columns)):
+        while past_index < len(past_results) and past_results[past_index][0] < s_date:
+            past_end_date, past_value, past_continent, past_country = past_results[past_index]
+            update_past_records(past_records, past_value, ('World', past_continent, past_country))
+            past_index += 1
 
         # check for record potential in order: national, continental, global
-        if check_record(value, row['min_round_nat'], row['cummin_comp_nat'], past_records, country):
-            record_data['computed'] = NR_MARKER
-            record_data['region'] = country
-            if check_record(value, row['min_round_con'], row['cummin_comp_con'], past_records, continent):
-                record_data['computed'] = CR_MARKER[continent]
-                record_data['region'] = continent
-                if check_record(value, row['min_round_world'], row['cummin_comp_world'], past_records, 'World'):
-                    record_data['computed'] = WR_MARKER
-                    record_data['region'] = 'World'
-            all_records.append(record_data)
-
-        # if no record was computed but a record is currently stored, this is a clear error.
-        # Adding these here to clear_errors right away is most convenient.
-        if record_data['computed'] == '' and marker != '':
-            err = output_tuple(record_data, event_id, kind)
-            clear_errors.append(err)
-
-        old_start_date = s_date
+        computed, region = '', ''
+        if potential_nat and check_record(value, past_records, country):
+            computed, region = NR_MARKER, country
+            if potential_con and check_record(value, past_records, continent):
+                computed, region = CR_MARKER[continent], continent
+                if potential_world and check_record(value, past_records, 'World'):
+                    computed, region = WR_MARKER, 'World'
+        computed_markers.append(computed)
+        regions.append(region)
+
+    # the potential records and the clear errors below are taken from the loop rows as whole columns
+    loop_df = loop_df.rename(columns={'roundTypeId': 'round', 'personCountryId': 'country', 'continentId': 'continent',
+                                      value_col: 'value', marker_col: 'marker'})
+    loop_df = loop_df.assign(computed=computed_markers, region=regions)
+    has_record = loop_df['computed'] != ''
+
+    # if no record was computed but a record is currently stored, this is a clear error.
+    # These rows are picked with one mask once all records are computed.
+    marker_errors = loop_df[~has_record & (loop_df['marker'] != '')]
+    clear_errors = [output_tuple(row, event_id, kind) for row in marker_errors.to_dict('records')]
 
     # then analyze records for (possible) errors
     print("Analyzing potential records for {} {} records...".format(event_id, kind))
 
-    record_df = pd.DataFrame(all_records)
+    record_df = loop_df.loc[has_record, ['personId', 'competitionId', 'round', 'value', 'country', 'continent',
+                                         'start_date', 'end_date', 'marker', 'computed', 'region']]
+    # (plain string columns are cheaper than categoricals for the many small slices taken below)
+    record_df = record_df.astype({col: str for col in ['competitionId', 'round', 'country', 'continent', 'marker']})
+    record_df = record_df.reset_index(drop=True)
     record_df['num_days'] = (record_df['end_date'] - record_df['start_date']).dt.days + 1
+    # record level as a small integer code (1 = national, 2 = continental, 3 = world) for cheap comparisons below
+    record_df['level'] = np.where(record_df['computed'] == WR_MARKER, 3,
+                                  np.where(record_df['computed'] == NR_MARKER, 1, 2)).astype('int8')
     record_competitions = record_df['competitionId'].unique()
-    evaluated_hashes = []  # list for storing hashes of evaluated DataFrames with records to prevent duplicate checks
-
+    evaluated_hashes = set()  # set for storing the row labels of evaluated record sets to prevent duplicate checks
+
+    # competitions with records sorted by start date, so that all competitions starting before a given end date
+    # form a prefix and only their end dates need to be compared
+    comps_by_start = competition_dates.loc[record_competitions].sort_values(by='start_date', kind='stable')
+    comp_ids = comps_by_start.index.to_numpy()
+    comp_starts = comps_by_start['start_date'].to_numpy()
+    comp_ends = comps_by_start['end_date'].to_numpy()
+    # no competition lasts longer than this, so only competitions starting at most this long before a given start
+    # date can still be running then
+    max_duration = (comp_ends - comp_starts).max()
+    comp_date_map = dict(zip(comps_by_start.index, zip(comps_by_start['start_date'], comps_by_start['end_date'])))
+    rows_by_comp = record_df.groupby('competitionId', sort=False).indices
+
+    last_overlapping_comps, record_groups = None, []
     for comp in record_competitions:
-        s_date, e_date = competition_dates.loc[comp]['start_date'], competition_dates.loc[comp]['end_date']
-        overlapping_comps = record_df[(s_date <= record_df['end_date'])
-                                      & (record_df['start_date'] <= e_date)].competitionId.unique()
-
-        # now check for world, continental and national records
-        comp_set_records = record_df[record_df['competitionId'].isin(overlapping_comps)]
-
-        # world records
-        curr_records = comp_set_records[comp_set_records['computed'] == WR_MARKER]
-        if comp in curr_records['competitionId'].values:
-            evaluate_records(curr_records, s_date.year, event_id, kind,
-                             clear_errors, possible_errors, evaluated_hashes)
-
-        # continental records
-        ov_con_records = comp_set_records[comp_set_records['computed'] != NR_MARKER]
-        curr_continents = list(ov_con_records['continent'].unique())
-        for con in curr_continents:
-            curr_records = ov_con_records[ov_con_records['continent'] == con]
-            if comp in curr_records['competitionId'].values \
-                    and (curr_records['computed'].isin(list(CR_MARKER.values()))).sum() > 0:
+        s_date, e_date = comp_date_map[comp]
+        # only the window of competitions that started between s_date - max_duration and e_date needs checking
+        first = comp_starts.searchsorted(s_date.to_datetime64() - max_duration, side='left')
+        started = comp_starts.searchsorted(e_date.to_datetime64(), side='right')
+        overlapping_comps = comp_ids[first:started][comp_ends[first:started] >= s_date.to_datetime64()]
+
+        # split the records of the overlapping competitions into the world, continental and national record groups
+        # that need checking, together with the competitions in each group. Competitions sharing the same overlap set
+        # usually come one after another, so the split of the previous competition is reused in that case.
+        if not np.array_equal(overlapping_comps, last_overlapping_comps):
+            # (comp_ids follows the order of record_df, so the concatenated row positions keep their original order)
+            comp_set_records = record_df.iloc[np.concatenate([rows_by_comp[c] for c in overlapping_comps])]
+            record_groups = []
+
+            # world records
+            curr_records = comp_set_records[comp_set_records['level'] == 3]
+            record_groups.append(curr_records)
+
+            # continental records
+            ov_con_records = comp_set_records[comp_set_records['level'] > 1]
+            # (split the records by region once, groups come in order of first appearance like unique() did)
+            for con, curr_records in ov_con_records.groupby('continent', sort=False):
+                if (curr_records['level'].to_numpy() == 2).any():
+                    record_groups.append(curr_records)
+
+            # national records
+            for nat, curr_records in comp_set_records.groupby('country', sort=False):
+                if (curr_records['level'].to_numpy() == 1).any():
+                    record_groups.append(curr_records)
+
+            record_groups = [(curr_records, set(curr_records['competitionId'])) for curr_records in record_groups]
+            last_overlapping_comps = overlapping_comps
+
+        # now check the groups with records of this competition
+        for curr_records, curr_comps in record_groups:
+            if comp in curr_comps:
                 evaluate_records(curr_records, s_date.year, event_id, kind,
-                                 clear_errors, possible_errors, evaluated_hashes)
+                                 stored_clear_errors, possible_errors, evaluated_hashes)
 
-        # national records
-        curr_countries = list(comp_set_records['country'].unique())
-        for nat in curr_countries:
-            curr_records = comp_set_records[comp_set_records['country'] == nat]
-            if comp in curr_records['competitionId'].values and (curr_records['computed'] == NR_MARKER).sum() > 0:
-                evaluate_records(curr_records, s_date.year, event_id, kind,
-                                 clear_errors, possible_errors, evaluated_hashes)
-
-    return clear_errors, possible_errors
+    return clear_errors + list(stored_clear_errors.values()), list(possible_errors.values())
 
 
 if __name__ == '__main__':
@@ -323,26 +358,41 @@ if __name__ == '__main__':
 
     # read in and prepare all required data from WCA database export
     # results data
+    # (the key columns are parsed straight into categoricals and the values into int32, which keeps the table small)
     results = pd.read_csv(DB_EXPORT_DIR + 'WCA_export_Results.tsv', delimiter='\t',
                           usecols=['competitionId', 'eventId', 'roundTypeId', 'personId', 'personCountryId', 'best',
-                                   'average', 'regionalSingleRecord', 'regionalAverageRecord']).fillna('')
-    results['round_rank'] = results['roundTypeId'].apply(get_round_rank)
+                                   'average', 'regionalSingleRecord', 'regionalAverageRecord'],
+                          dtype={'competitionId': 'category', 'eventId': 'category', 'roundTypeId': 'category',
+                                 'personCountryId': 'category', 'best': 'int32', 'average': 'int32',
+                                 'regionalSingleRecord': 'category', 'regionalAverageRecord': 'category'},
+                          keep_default_na=False)  # keep missing markers as empty strings
+    results['round_rank'] = results['roundTypeId'].map(ROUND_RANKS).astype('int8')
     # exclude 333mbo since these records cannot be properly analyzed (many better results were changed to 333mbf)
     results = results[results['eventId'] != '333mbo']
 
     # competition data
     competition_data = pd.read_csv(DB_EXPORT_DIR + 'WCA_export_Competitions.tsv', delimiter='\t',
-                                   usecols=['id', 'year', 'month', 'day', 'endMonth', 'endDay'])
-    competition_data['start_date'] = pd.to_datetime(competition_data.apply(get_start_date, axis=1))
-    competition_data['end_date'] = pd.to_datetime(competition_data.apply(get_end_date, axis=1))
-    comp_dates = competition_data[['id', 'start_date', 'end_date']].rename(columns={'id': 'competitionId'})
-    results = results.merge(comp_dates, how='inner', on='competitionId')
-    comp_dates.set_index(keys='competitionId', inplace=True)
+                                   usecols=['id', 'year', 'month', 'day', 'endMonth', 'endDay'],
+                                   dtype={'year': 'int16', 'month': 'int8', 'day': 'int8', 'endMonth': 'int8',
+                                          'endDay': 'int8'})
+    competition_data['start_date'] = pd.to_datetime(competition_data[['year', 'month', 'day']])
+    # the end date lies in the following year if the competition spans the turn of the year
+    end_year = competition_data['year'] + (competition_data['endMonth'] < competition_data['month']).astype(int)
+    competition_data['end_date'] = pd.to_datetime(pd.DataFrame({'year': end_year, 'month': competition_data['endMonth'],
+                                                                'day': competition_data['endDay']}))
+    # (the lookup tables are indexed by their unique ids, so the joins below only hash the keys of results)
+    comp_dates = competition_data.set_index('id')[['start_date', 'end_date']].rename_axis('competitionId')
+    results = results.join(comp_dates, on='competitionId', how='inner', validate='m:1')
 
     # country data
-    countries = pd.read_csv(DB_EXPORT_DIR + 'WCA_export_Countries.tsv', delimiter='\t', usecols=['id', 'continentId'])
-    countries.rename(columns={'id': 'personCountryId'}, inplace=True)
-    results = results.merge(countries, how='inner', on='personCountryId')
+    countries = pd.read_csv(DB_EXPORT_DIR + 'WCA_export_Countries.tsv', delimiter='\t', usecols=['id', 'continentId'],
+                            index_col='id')
+    results = results.join(countries, on='personCountryId', how='inner', validate='m:1')
+
+    # the merge keys and the continents come out of the merges as plain strings, so cast them to categoricals as
+    # well to speed up the filtering and grouping per event
+    for col in ['competitionId', 'personCountryId', 'continentId']:
+        results[col] = results[col].astype('category')
 
     # create lists of events, initialize error lists to store results
     single_events = results[results['best'] > 0].eventId.unique()
@@ -350,33 +400,45 @@ if __name__ == '__main__':
     events_to_check = [(event, 'single') for event in single_events] + [(event, 'average') for event in average_events]
     all_clear_errors, all_possible_errors = [], []
 
+    # split the results by event once instead of filtering the whole table for every check
+    # (the event column is dropped right away, the single and average checks of an event share the same frame)
+    results_by_event = {event_id: event_results.drop(columns=['eventId'])
+                        for event_id, event_results in results.groupby('eventId', sort=False, observed=True)}
+
     # record consistency check
-    # this is done one event at a time, first for single, then for average
-    for i, (curr_event_id, curr_kind) in enumerate(events_to_check):
-        runtime = time.time() - start_time
-        print("[{}/{} {:02d}:{:02d}] Checking consistency for {} {} records:".format(
-            i + 1, len(events_to_check), int(runtime / 60), int(runtime) % 60, curr_event_id, curr_kind))
-        ce, pe = record_consistency_check(results, comp_dates, curr_event_id, curr_kind)
-        all_clear_errors.extend(ce)
-        all_possible_errors.extend(pe)
+    # the events are independent of each other, so they are checked in parallel worker processes; the results are
+    # collected in the original order, first for single, then for average
+    with ProcessPoolExecutor() as pool:
+        futures = [pool.submit(record_consistency_check, results_by_event[curr_event_id], comp_dates, curr_event_id,
+                               curr_kind) for curr_event_id, curr_kind in events_to_check]
+        for i, ((curr_event_id, curr_kind), future) in enumerate(zip(events_to_check, futures)):
+            ce, pe = future.result()
+            runtime = time.time() - start_time
+            print("[{}/{} {:02d}:{:02d}] Checked consistency for {} {} records.".format(
+                i + 1, len(events_to_check), int(runtime / 60), int(runtime) % 60, curr_event_id, curr_kind))
+            all_clear_errors.extend(ce)
+            all_possible_errors.extend(pe)
 
     # output consistency check results
+    # (the whole output is assembled in memory and written with a single call)
+    column_headers = ['WCA-ID', 'country', 'continent', 'event', 'record type', 'result', 'competition',
+                      'start date', 'end date', 'round', 'stored', 'computed']
+    output = []
+
+    # Output clear errors
+    output.append('Clear errors: {}\n\n'.format(len(all_clear_errors)))
+    output.append('\t'.join(column_headers) + '\n\n' if all_clear_errors else '')
+    output.extend(format_error_output(detected_error) + '\n\n' for detected_error in all_clear_errors)
+
+    # Filter possible errors for end_date >= possible_errors_start_date for at least one of the included results
+    # (the end dates are stored as ISO strings, which compare like the dates themselves, so no need to parse them)
+    first_end_date = pd.Timestamp(possible_errors_start_date).ceil('D').strftime('%Y-%m-%d')
+    all_possible_errors = [pe for pe in all_possible_errors if any(err[8] >= first_end_date for err in pe)]
+
+    # Output possible errors
+    output.append('\nPossible errors: {}\n\n'.format(len(all_possible_errors)))
+    output.append('\t'.join(column_headers) + '\n\n' if all_possible_errors else '')
+    output.extend(format_error_output(detected_error) + '\n\n' for detected_error in all_possible_errors)
+
     with open(OUTPUT_FILE, "w") as output_stream:
-        column_headers = ['WCA-ID', 'country', 'continent', 'event', 'record type', 'result', 'competition',
-                          'start date', 'end date', 'round', 'stored', 'computed']
-
-        # Output clear errors
-        output_stream.write('Clear errors: {}\n\n'.format(len(all_clear_errors)))
-        output_stream.write('\t'.join(column_headers) + '\n\n' if all_clear_errors else '')
-        for detected_error in all_clear_errors:
-            output_stream.write(format_error_output(detected_error) + '\n\n')
-
-        # Filter possible errors for end_date >= possible_errors_start_date for at least one of the included results
-        all_possible_errors = [pe for pe in all_possible_errors
-                               if len([err for err in pe if pd.to_datetime(err[8]) >= possible_errors_start_date]) > 0]
-
-        # Output possible errors
-        output_stream.write('\nPossible errors: {}\n\n'.format(len(all_possible_errors)))
-        output_stream.write('\t'.join(column_headers) + '\n\n' if all_possible_errors else '')
-        for detected_error in all_possible_errors:
-            output_stream.write(format_error_output(detected_error) + '\n\n')
+        output_stream.write(''.join(output))
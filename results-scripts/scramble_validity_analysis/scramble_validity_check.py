@@ -20,8 +20,9 @@ https://www.worldcubeassociation.org/results/misc/export.html
 __author__ = "Sébastien Auroux"
 __contact__ = "sebastien@auroux.de"
 
-import re, datetime
+import re, csv, datetime
 from collections import defaultdict
+import pandas as pd
 
 # Location of the database export used by the script
 SCRAMBLES_TSV_EXPORT = "db_export/WCA_export_Scrambles.tsv"
@@ -84,58 +85,79 @@ pattern_dict = {
     
 patterns = {event: re.compile(pattern_dict[event]) for event in pattern_dict}
 
-with open("db_export/WCA_export_Competitions.tsv", 'r', encoding="utf8") as f:
-    competitions = [line.strip().split('\t')[0] for line in f.readlines()[1:]]
-with open("db_export/WCA_export_Events.tsv", 'r') as f:
-    events = [line.strip().split('\t')[0] for line in f.readlines()[1:]]
-with open("db_export/WCA_export_RoundTypes.tsv", 'r') as f:
-    round_types = [line.strip().split('\t')[0] for line in f.readlines()[1:]]
+# scrambles of events with a fixed number of moves have a bounded length, anything outside it is invalid
+# without running the regular expression (the upper bounds allow for a trailing line break, which $ accepts).
+length_bounds = {
+    # 11 moves of 1-2 characters plus separators (and up to 4 tips for pyram)
+    '222': (21, 33), 'pyram': (21, 45), 'skewb': (21, 33),
+    # 60, 80 and 100 moves of up to 3 (555) or 4 (666, 777) characters plus separators
+    '555': (119, 240), '666': (159, 400), '777': (199, 500),
+    # the fixed clock sequence plus up to 4 pins, and 7 megaminx lines of 41-42 characters plus separators
+    'clock': (66, 79), 'minx': (293, 302),
+}
+
+
+def read_ids(export_file):
+    """ reads the ids in the first column of a WCA export table, streamed row by row """
+    with open(export_file, 'r', encoding="utf8", newline='') as f:
+        reader = csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE)
+        next(reader)
+        return frozenset(row[0].strip() for row in reader if row)
+
+
+competitions = read_ids("db_export/WCA_export_Competitions.tsv")
+events = read_ids("db_export/WCA_export_Events.tsv")
+round_types = read_ids("db_export/WCA_export_RoundTypes.tsv")
 
 checklists = {'competitionId': competitions, 'eventId': events, 'roundTypeId': round_types}
 
-fin = open(SCRAMBLES_TSV_EXPORT, 'r')
-scramble_columns = fin.readline().strip().split('\t')
-fout = open(OUTPUT_FILE, 'w')
-checked_scrambles = 0
+scrambles = pd.read_csv(SCRAMBLES_TSV_EXPORT, sep='\t', dtype=str, quoting=csv.QUOTE_NONE, keep_default_na=False)
+# strip the outer fields of each row like stripping the whole line would (trailing whitespace is no error)
+scrambles['scrambleId'] = scrambles['scrambleId'].str.lstrip()
+scrambles['scramble'] = scrambles['scramble'].str.rstrip()
+# competitionIds not ending in a year are kept, so that they get reported as competitionId errors below
+competition_year = pd.to_numeric(scrambles['competitionId'].str[-4:], errors='coerce')
+checked_years = competition_year.isna() | (competition_year >= MIN_COMPETITION_YEAR)
+scrambles = scrambles[checked_years]
+competition_year = competition_year[checked_years]
+
+# mark invalid values column by column, each row is reported for its first invalid column only
+invalid = pd.DataFrame(False, index=scrambles.index, columns=scrambles.columns)
+for c in scrambles.columns:
+    if c in patterns:
+        # covers scrambleId, groupId, isExtra, scrambleNum
+        invalid[c] = scrambles[c].map(patterns[c].match).isna()
+    elif c in checklists:
+        # covers competitionId, eventId, roundTypeId
+        invalid[c] = ~scrambles[c].isin(checklists[c])
+    else: # only c = 'scramble' remains
+        # catch the special case of 333fm scrambles >= 2017 (see '333fm_new' in pattern_dict)
+        scramble_pattern = scrambles['eventId'].mask((scrambles['eventId'] == '333fm') & (competition_year >= 2017),
+                                                     '333fm_new')
+        for event, rows in scrambles.groupby(scramble_pattern).groups.items():
+            if event in patterns:
+                group = scrambles.loc[rows, c]
+                if event in length_bounds:
+                    group = group[group.str.len().between(*length_bounds[event])]
+                invalid.loc[rows, c] = True
+                invalid.loc[group.index, c] = group.map(patterns[event].match).isna()
+            else:
+                invalid.loc[rows, c] = True
+
+error_rows = invalid.any(axis=1)
+error_columns = invalid[error_rows].idxmax(axis=1)
 errors_found = defaultdict(int)
-
-while True:
-    try:
-        current_line = fin.readline().strip().split('\t')
-        d = {c: current_line[i] for i, c in enumerate(scramble_columns)}
-        competition_year = int(d['competitionId'][-4:])
-
-        if competition_year < MIN_COMPETITION_YEAR:
-            continue
-
-        invalid = False
-        for c in d: 
-            # go through all columns of the current Scrambles table row
-            if c in patterns: 
-                # covers scrambleId, groupId, isExtra, scrambleNum
-                invalid = (patterns[c].match(d[c]) is None)
-            elif c in checklists: 
-                # covers competitionId, eventId, roundTypeId
-                invalid = (d[c] not in checklists[c])
-            else: # only c = 'scramble' remains
-                if d['eventId'] == '333fm' and competition_year >= 2017:
-                    # catch the special case of 333fm scrambles >= 2017 (see '333fm_new' in pattern_dict)
-                    invalid = (patterns['333fm_new'].match(d[c]) is None)
-                else:
-                    invalid = (patterns[d['eventId']].match(d[c]) is None)
-
-            if invalid:
-                output = 'Error for ' + c + ': ' + str(d)
-                fout.write(output + '\n')
-                print(output)
-                errors_found[c] += 1
-                break
-
-        checked_scrambles += 1
-
-    except:
-        print('Total number of scrambles checked:', checked_scrambles)
-        print('Total number of errors found:', sum(errors_found.values()) if len(errors_found) else 0)
-        for c in errors_found:
-            print(c, 'errors:', errors_found[c])
-        break
\ No newline at end of file
+outputs = []
+for c, d in zip(error_columns, scrambles[error_rows].to_dict('records')):
+    output = 'Error for ' + c + ': ' + str(d)
+    outputs.append(output + '\n')
+    print(output)
+    errors_found[c] += 1
+
+with open(OUTPUT_FILE, 'w') as fout:
+    fout.write(''.join(outputs))
+
+print('Total number of scrambles checked:', len(scrambles))
+print('Total number of errors found:', sum(errors_found.values()) if len(errors_found) else 0)
+for c in errors_found:
+    print(c, 'errors:', errors_found[c])
@@ -22,13 +22,18 @@ __author__ = "Sébastien Auroux"
 __contact__ = "sebastien@auroux.de"
 
 import numpy as np
+import csv
 import re
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 # Location of the database export used by the script
 scramble_export_file = "Scrambles_raw.tsv"
 # Name of the output file
 output_file = "irregular_scrambles_raw.txt"
+# Number of table rows checked per worker task
+rows_per_chunk = 10000
 
 # defining regular expressions patterns matching the scramble strucutre for each WCA event.
 # In addition, I am defining simple patterns for the non-scramble columns in the WCA Scrambles table.
@@ -79,77 +84,126 @@ pattern_dict = {
     
 patterns = {event: re.compile(pattern_dict[event]) for event in pattern_dict}
 
-with open("db_export/WCA_export_Competitions.tsv", 'r', encoding="utf8") as f:
-    competitions = [line.strip().split('\t')[0] for line in f.readlines()[1:]]
-with open("db_export/WCA_export_Events.tsv", 'r') as f:
-    events = [line.strip().split('\t')[0] for line in f.readlines()[1:]]
-with open("db_export/WCA_export_RoundTypes.tsv", 'r') as f:
-    roundtypes = [line.strip().split('\t')[0] for line in f.readlines()[1:]]
+# scrambles of events with a fixed number of moves have a bounded length, anything outside it is invalid
+# without running the regular expression (the upper bounds allow for a trailing line break, which $ accepts).
+length_bounds = {
+    # 11 moves of 1-2 characters plus separators (and up to 4 tips for pyram)
+    '222': (21, 33), 'pyram': (21, 45), 'skewb': (21, 33),
+    # 60, 80 and 100 moves of up to 3 (555) or 4 (666, 777) characters plus separators
+    '555': (119, 240), '666': (159, 400), '777': (199, 500),
+    # the fixed clock sequence plus up to 4 pins, and 7 megaminx lines of 41-42 characters plus separators
+    'clock': (66, 79), 'minx': (293, 302),
+}
 
-checklists = {'competitionId': competitions, 'eventId': events, 'roundTypeId': roundtypes}
 
-fin = open(scramble_export_file, 'r')
-scramble_columns = fin.readline().strip().split('\t')
-fout = open(output_file, 'w')
-checked_scrambles = 0
-errors_found = defaultdict(int)
-
-# Due to the raw data input, a new line does no longer equal a new table row.
-# Therefore, I always look one line ahead until I find the beginning of the next table row.
-new_table_row = re.compile("^[1-9][0-9]*\t")
-current_line = fin.readline().split('\t')
-
-while True:
-    try:   
-        d = {c: current_line[i] for i, c in enumerate(scramble_columns)}
-        
-        while True:
-            next_line = fin.readline()
-            if next_line.strip() == '':
-                # end of file
-                break
-            if new_table_row.match(next_line) is None:
-                # no new table row, append it to the current scramble
-                d['scramble'] += next_line
-            else: 
-                # otherwise, prepare & keep the next line as current_line for the next iteration.
-                current_line = next_line.split('\t')
-                break
+def read_ids(export_file):
+    """ reads the ids in the first column of a WCA export table, streamed row by row """
+    with open(export_file, 'r', encoding="utf8", newline='') as f:
+        reader = csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE)
+        next(reader)
+        return frozenset(row[0].strip() for row in reader if row)
+
+
+competitions = read_ids("db_export/WCA_export_Competitions.tsv")
+events = read_ids("db_export/WCA_export_Events.tsv")
+roundtypes = read_ids("db_export/WCA_export_RoundTypes.tsv")
 
-        invalid = False
-        for c in d: 
-            # go through all columns of the current Scrambles table row
-            if c in patterns: 
-                # covers scrambleId, groupId, isExtra, scrambleNum
-                invalid = (patterns[c].match(d[c]) is None)
-            elif c in checklists: 
-                # covers competitionId, eventId, roundTypeId
-                invalid = (d[c] not in checklists[c])
-            else: # only c = 'scramble' remains
-                competition_year = int(d['competitionId'][-4:])
-                if d['eventId'] == '333fm' and competition_year >= 2017:
-                    # catch the special case of 333fm scrambles >= 2017 (see '333fm_new' in pattern_dict)
-                    invalid = (patterns['333fm_new'].match(d[c]) is None)
-                else:
-                    invalid = (patterns[d['eventId']].match(d[c]) is None)
-
-            if invalid:
+checklists = {'competitionId': competitions, 'eventId': events, 'roundTypeId': roundtypes}
+
+# bound match methods of the scramble patterns, resolved once instead of for every row
+scramble_matchers = {event: patterns[event].match for event in patterns}
+match_333fm_new = patterns['333fm_new'].match
+
+
+def check_rows(scramble_columns, rows):
+    """ checks a chunk of raw table rows and returns the invalid column and the row of every invalid row, the number
+    of checked rows and whether a row could not be checked at all (which ends the whole check) """
+
+    # resolve the position and the check of each column once instead of looking them up for every row; the row
+    # dict is only built for the output of invalid rows
+    column_checks = [(i, c, patterns[c].match if c in patterns else None, checklists.get(c))
+                     for i, c in enumerate(scramble_columns)]
+    i_competition, i_event = scramble_columns.index('competitionId'), scramble_columns.index('eventId')
+    errors = []
+    checked_rows = 0
+
+    for row in rows:
+        fields = row.split('\t', len(scramble_columns) - 1)
+        if len(fields) < len(scramble_columns):
+            # a row with missing fields cannot be checked
+            return errors, checked_rows, True
+
+        try:
+            invalid = False
+            for i, c, match, checklist in column_checks:
+                # go through all columns of the current Scrambles table row
+                value = fields[i]
+                if match is not None:
+                    # covers scrambleId, groupId, isExtra, scrambleNum
+                    invalid = (match(value) is None)
+                elif checklist is not None:
+                    # covers competitionId, eventId, roundTypeId
+                    invalid = (value not in checklist)
+                else: # only c = 'scramble' remains
+                    # (the competitionId is valid at this point, so its last 4 characters are the year and can be
+                    # compared as a string)
+                    event = fields[i_event]
+                    if event == '333fm' and fields[i_competition][-4:] >= '2017':
+                        # catch the special case of 333fm scrambles >= 2017 (see '333fm_new' in pattern_dict)
+                        invalid = (match_333fm_new(value) is None)
+                    elif event in length_bounds and not \
+                            length_bounds[event][0] <= len(value) <= length_bounds[event][1]:
+                        invalid = True
+                    else:
+                        invalid = (scramble_matchers[event](value) is None)
+
+                if invalid:
+                    errors.append((c, dict(zip(scramble_columns, fields))))
+                    break
+
+            checked_rows += 1
+
+        except KeyError:
+            # a row with an unknown event cannot be checked
+            return errors, checked_rows, True
+
+    return errors, checked_rows, False
+
+
+if __name__ == '__main__':
+    with open(scramble_export_file, 'r') as fin:
+        scramble_columns = fin.readline().strip().split('\t')
+        data = fin.read()
+
+    # Due to the raw data input, a new line does no longer equal a new table row.
+    # Therefore, the whole file is read at once and split where the next table row begins (the first row
+    # starts right after the header). A whitespace-only line marks the end of the data.
+    end_of_data = re.search(r"^\s*$", data, re.MULTILINE)
+    if end_of_data is not None:
+        data = data[:end_of_data.start()]
+    new_table_row = re.compile("^[1-9][0-9]*\t", re.MULTILINE)
+    row_starts = [0] + [m.start() for m in new_table_row.finditer(data, 1)] if data else []
+    row_ends = row_starts[1:] + [len(data)]
+    rows = [data[row_start:row_end] for row_start, row_end in zip(row_starts, row_ends)]
+
+    checked_scrambles = 0
+    errors_found = defaultdict(int)
+
+    # the rows are independent of each other, so chunks of them are checked in parallel worker processes;
+    # the results come back in the original order
+    chunks = [rows[i:i + rows_per_chunk] for i in range(0, len(rows), rows_per_chunk)]
+    with open(output_file, 'w') as fout, ProcessPoolExecutor() as pool:
+        for errors, checked_rows, aborted in pool.map(check_rows, repeat(scramble_columns), chunks):
+            for c, d in errors:
                 output = 'Error for ' + c + ': ' + str(d)
                 fout.write(output + '\n')
                 print(output)
                 errors_found[c] += 1
+            checked_scrambles += checked_rows
+            if aborted:
                 break
 
-        checked_scrambles += 1
-
-        if next_line.strip() == '':
-            # end of file
-            break
-
-    except:
-        break
-
-print('Total number of scrambles checked:', checked_scrambles)
-print('Total number of errors found:', sum(errors_found.values()) if len(errors_found) else 0)
-for c in errors_found:
-    print(c, 'errors:', errors_found[c])
\ No newline at end of file
+    print('Total number of scrambles checked:', checked_scrambles)
+    print('Total number of errors found:', sum(errors_found.values()) if len(errors_found) else 0)
+    for c in errors_found:
+        print(c, 'errors:', errors_found[c])
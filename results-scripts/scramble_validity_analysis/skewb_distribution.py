@@ -10,31 +10,21 @@ Just a small script analyzing the distribution of Skewb scramble lengths in the
 __author__ = "Sébastien Auroux"
 __contact__ = "sebastien@auroux.de"
 
-import numpy as np
-import re
-from collections import defaultdict
+import csv
+import pandas as pd
 
 # Location of the database export used by the script
 scramble_export_file = "db_export/WCA_export_Scrambles.tsv"
 
-prog = re.compile('[RULB]\'?')
-
-fin = open(scramble_export_file, 'r')
-scramble_columns = fin.readline().strip().split('\t')
-skewb_moves = defaultdict(int)
-fout = open('skewb_outliers.txt', 'w')
-
-while True:
-    try:
-        tmp = fin.readline().strip().split('\t')
-        d = {c: tmp[i] for i, c in enumerate(scramble_columns)}
-        if d['eventId'] != 'skewb': # or d['competitionId'] != 'CubingUSANationals2018':
-            continue
-        scramble_length = len(prog.findall(d['scramble']))
-        skewb_moves[scramble_length] += 1
-        if scramble_length != 11:
-            fout.write(str(d) + '\n')
-    except:
-        for m in sorted(list(skewb_moves.keys())):
-            print('Number of Skewb scrambles with {} moves: {}'.format(m, skewb_moves[m]))
-        break
\ No newline at end of file
+scrambles = pd.read_csv(scramble_export_file, sep='\t', dtype=str, quoting=csv.QUOTE_NONE, keep_default_na=False)
+# strip the outer fields of each row like stripping the whole line would, which keeps the outlier dump the same
+scrambles['scrambleId'] = scrambles['scrambleId'].str.lstrip()
+scrambles['scramble'] = scrambles['scramble'].str.rstrip()
+skewb = scrambles[scrambles['eventId'] == 'skewb'] # & (scrambles['competitionId'] == 'CubingUSANationals2018')]
+scramble_lengths = skewb['scramble'].str.count('[RULB]\'?')
+
+with open('skewb_outliers.txt', 'w') as fout:
+    fout.write(''.join(str(d) + '\n' for d in skewb[scramble_lengths != 11].to_dict('records')))
+
+for m, n in scramble_lengths.value_counts().sort_index().items():
+    print('Number of Skewb scrambles with {} moves: {}'.format(m, n))
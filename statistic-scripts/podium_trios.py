@@ -18,61 +18,84 @@ https://www.worldcubeassociation.org/results/misc/export.html
 __author__ = "Sébastien Auroux"
 __contact__ = "sebastien@auroux.de"
 
-import zipfile, csv
+import zipfile, csv, io
 import itertools
+from collections import Counter
 
 source = 'WCA_export007_20180223.tsv.zip'
 output_file = 'podium_trios_20180223.txt'
 
+# read the zip members through a large buffer, ZipExtFile itself only reads small chunks
+read_buffer_size = 1 << 20
+
+podium_positions = frozenset(['1','2','3'])
+final_round_types = frozenset(['c','f'])
+invalid_results = frozenset(['-2','-1','0'])
+
 people = []
 podiums = {}
 names = {}
 podiums_person = {}
+first_seen = {}
+sdict = Counter()
 
 with zipfile.ZipFile(source) as zf:
-	with zf.open('WCA_export_Results.tsv') as pf:
-		for row in csv.DictReader(pf, delimiter='\t'):
-			if not row['competitionId'] in podiums:
-				podiums[row['competitionId']] = {}
-			if not row['eventId'] in podiums[row['competitionId']]:
-				podiums[row['competitionId']][row['eventId']] = []
-			if row['pos'] in ['1','2','3'] and row['roundTypeId'] in ['c','f'] and row['best'] not in ['-2','-1','0']:
-				podiums[row['competitionId']][row['eventId']].append(row['personId'])
-				if not row['personId'] in people:
-					people.append(row['personId'])
-					podiums_person[row['personId']] = []
-				podiums_person[row['personId']].append([row['competitionId'],row['eventId']])
-	with zf.open('WCA_export_Persons.tsv') as pf:
-		for row in csv.DictReader(pf, delimiter='\t'):
-			if row['subid'] == '1':
-				names[row['id']] = row['name']
-
-sdict = {}
-
-for i in range(0,len(people)):
-	print("Searching for podium person " + str(i+1) + " out of " + str(len(people)) + ": " + people[i])
-	for p in podiums_person[people[i]]:
-		for j in podiums[p[0]][p[1]]:
-			for k in podiums[p[0]][p[1]]:
-				if (people[i],k,j) not in sdict and (j,people[i],k) not in sdict and (j,k,people[i]) not in sdict and (k,people[i],j) not in sdict and (k,j,people[i]) not in sdict:
-					if not (people[i],j,k) in sdict:
-						sdict[(people[i],j,k)] = 0
-					if people[i]<>j and people[i]<>k and j<>k:
-						sdict[(people[i],j,k)] += 1
-
-scores = [[s[0],s[1],s[2],sdict[s]] for s in sdict]
+	with io.BufferedReader(zf.open('WCA_export_Results.tsv'), buffer_size=read_buffer_size) as pf:
+		reader = csv.reader(pf, delimiter='\t')
+		header = next(reader)
+		i_comp, i_event, i_round, i_pos, i_best, i_person = [header.index(c) for c in
+			['competitionId', 'eventId', 'roundTypeId', 'pos', 'best', 'personId']]
+		for row in reader:
+			if row[i_pos] in podium_positions and row[i_round] in final_round_types and row[i_best] not in invalid_results:
+				person = intern(row[i_person])
+				podium = podiums.setdefault(row[i_comp], {}).setdefault(row[i_event], [])
+				# count the trios of the new podium person with every pair already on this podium
+				for pair in itertools.combinations(podium, 2):
+					trio = tuple(sorted(pair + (person,)))
+					if trio[0] != trio[1] and trio[1] != trio[2]:
+						sdict[trio] += 1
+				podium.append(person)
+				if not person in first_seen:
+					first_seen[person] = len(people)
+					people.append(person)
+					podiums_person[person] = []
+				podiums_person[person].append(podium)
+	with io.BufferedReader(zf.open('WCA_export_Persons.tsv'), buffer_size=read_buffer_size) as pf:
+		reader = csv.reader(pf, delimiter='\t')
+		header = next(reader)
+		i_id, i_subid, i_name = [header.index(c) for c in ['id', 'subid', 'name']]
+		for row in reader:
+			if row[i_subid] == '1':
+				names[intern(row[i_id])] = row[i_name]
+
+# list the trios the way a scan over the podiums of every person (in order of first appearance) meets them:
+# each trio is led by its first seen person, followed by the others in podium order, and keeps the position of its
+# first shared podium, which fixes the order of tied trios and thus the Top 100 cutoff
+ordered = {}
+listed = set()
+for person in people:
+	for podium in podiums_person[person]:
+		for j in podium:
+			for k in podium:
+				if first_seen[j] >= first_seen[person] and first_seen[k] >= first_seen[person]:
+					trio = tuple(sorted((person, j, k)))
+					if not trio in listed:
+						listed.add(trio)
+						ordered[(person, j, k)] = sdict[trio]
+
+scores = [[s[0],s[1],s[2],n] for s, n in ordered.items()]
 scores.sort(key=lambda s: s[3], reverse=True)
 
-out = ''
-out += '[spoiler="Top 100 of most common podium trios"][table="width: 1000, class: grid, align: left"]\n'
-out += '[tr][td][b]#[/b][/td][td][b]Person 1[/b][/td][td][b]Person 2[/b][/td][td][b]Person 3[/b][/td][td][b]Amount of shared Podiums[/b][/td][/tr]\n'
+out = []
+out.append('[spoiler="Top 100 of most common podium trios"][table="width: 1000, class: grid, align: left"]\n')
+out.append('[tr][td][b]#[/b][/td][td][b]Person 1[/b][/td][td][b]Person 2[/b][/td][td][b]Person 3[/b][/td][td][b]Amount of shared Podiums[/b][/td][/tr]\n')
 pos = "1."
 for i in range(0,100):
 	if i > 0 and scores[i][3] < scores[i-1][3]:
 		pos = str(i+1) + "."
 	cells = (pos, names[scores[i][0]], names[scores[i][1]], names[scores[i][2]], scores[i][3])
-	out += '[tr]' + ''.join('[td]{}[/td]'.format(x) for x in cells) + '[/tr]\n'
-out += '[/table][/spoiler]'
+	out.append('[tr]' + ''.join('[td]{}[/td]'.format(x) for x in cells) + '[/tr]\n')
+out.append('[/table][/spoiler]')
 
 fout = open(output_file, "w")
-fout.write(out)
+fout.write(''.join(out))